@@ -7,11 +7,23 @@ __version__ = "0.2.0"
 
 from zen_custom import class_logger, handle_plural
 
-from collections import OrderedDict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from enum import Enum
+from functools import lru_cache
+from os.path import join, normpath
+from string import ascii_letters, digits
+from sys import intern
+from yaml import load
 
 import re
 
+# Use the libyaml based loader when it's available
+try:
+    from yaml import CSafeLoader as YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as YAMLLoader
+
 
 class KConfigSubtype(type):
     """
@@ -28,13 +40,14 @@ class KConfigSubtype(type):
             t = kwargs.pop('type')
             return getattr(KConfigTypes, t).value(*args, **kwargs)
 
-        for t in KConfigTypes:
-            if match := re.search(t.value.start_regex, args[0]):
-                # Remove the first argument, which is the config line
-                args = args[1:]
-                if prompt := match.group(1):
-                    kwargs['value'] = prompt
-                return t.value(*args, **kwargs)
+        # The subtype is determined by the first token of the config line
+        # Empty and whitespace only lines have no tokens, they make a plain KConfigParameter
+        if (tokens := args[0].split(None, 1)) and (kconfig_type := KConfigKeywords.get(tokens[0])):
+            # Remove the first argument, which is the config line
+            args = args[1:]
+            if len(tokens) > 1:
+                kwargs['value'] = tokens[1]
+            return kconfig_type(*args, **kwargs)
         return super().__call__(*args, **kwargs)
 
 
@@ -43,15 +56,12 @@ def parse_with_type(cls):
     Decorator for KConfigParameter subclasses, adds variable parsing functionality
     """
     class KConfigParameterWithType(cls):
-        _variable_type_regex = r'^\s*{var_type}\s*"?(.+)(?:")$'
+        __slots__ = ('variable_type',)
+        # Extend the parameters of the decorated class
+        parameters = {**cls.parameters, 'variable_type': None}
         variable_types = ['string', 'bool', 'tristate']
-
-        def _init_parameters(self):
-            """
-            Custom init_parameters extention for KConfigParameterWithType
-            """
-            super()._init_parameters()
-            self.parameters['variable_type'] = None
+        # Bound search method of a single pattern matching any variable type, the type is captured first
+        _variable_type_search = re.compile(rf'^\s*({"|".join(variable_types)})\s*"?(.+)(?:")$').search
 
         def process_line(self, config_line):
             """
@@ -60,21 +70,22 @@ def parse_with_type(cls):
             # First use the super function
             super_result = super().process_line(config_line)
 
-            self.logger.debug("Attempting to process type information: %s" % config_line)
+            debug = self.logger.debug
+            debug("Attempting to process type information: %s", config_line)
             # Check if the line contains a variable type
-            for var_type in self.variable_types:
-                re_str = self._variable_type_regex.format(var_type=var_type)
-                self.logger.debug("Compiled regex: %s" % re_str)
-                if match := re.search(re_str, config_line):
-                    self.logger.debug("Found variable type: %s" % var_type)
-                    self.variable_type = var_type
-                    if value := match.group(1):
-                        self.logger.debug("Found variable value: %s" % value)
-                        self.value = value
-                    return True
+            if match := self._variable_type_search(config_line):
+                var_type, value = match.groups()
+                debug("Found variable type: %s", var_type)
+                self.variable_type = var_type
+                if value:
+                    debug("Found variable value: %s", value)
+                    self.value = value
+                return True
             return super_result
 
     KConfigParameterWithType.__name__ = cls.__name__
+    # Match the qualified name too, so instances can be pickled
+    KConfigParameterWithType.__qualname__ = cls.__qualname__
 
     return KConfigParameterWithType
 
@@ -84,59 +95,60 @@ class KConfigParameter(metaclass=KConfigSubtype):
     """
     Abstraction of a general KConfig Parameter
     """
-    def _init_parameters(self):
-        """
-        Initializes self.parameters, extended by subclasses
-        """
-        self.parameters = {'default': None,
-                           'value': None}
+    __slots__ = ('logger', 'default', 'value')
+
+    # Parameter names and their default values, shared by all instances and extended by subclasses
+    parameters = {'default': None,
+                  'value': None}
 
     def __init__(self, *args, **kwargs):
         """
         Creates a KConfigParameter object
         """
-        self._init_parameters()
+        # Set every parameter, using the defaults for any which weren't passed
+        for parameter, default in self.parameters.items():
+            setattr(self, parameter, kwargs.pop(parameter, default))
 
-        for parameter in self.parameters:
-            if parameter in kwargs:
-                setattr(self, parameter, kwargs.pop(parameter))
-            else:
-                setattr(self, parameter, self.parameters[parameter])
+    def __setstate__(self, state):
+        """
+        Restores a pickled parameter, such as one parsed by a KConfig worker process
+        The logger is restored first, class_logger uses it when any other attribute is set
+        """
+        _, slot_state = state
+        self.logger = slot_state.pop('logger')
+        for name, value in slot_state.items():
+            setattr(self, name, value)
 
     def process_line(self, config_line):
         """
         Parses a line from a KConfig file
         """
-        self.logger.debug("Attempting to process line: %s" % config_line)
+        self.logger.debug("Attempting to process line: %s", config_line)
         return False
 
     def __str__(self):
         """
         Returns a string representation of the KConfigParameter
         """
-        out_str = f"{self.__class__.__name__}: "
-        (out_str.append(getattr(self, parameter)) for parameter in self.parameters if parameter)
-        return out_str
+        parameter_strs = (f"{parameter}={value}" for parameter in self.parameters
+                          if (value := getattr(self, parameter)) is not None)
+        return f"{self.__class__.__name__}: " + ", ".join(parameter_strs)
 
 
 class KConfigChoice(KConfigParameter):
     """
     Abstraction of a linux kernel KConfig choice option
     """
-    # Choices start with "choice" followed by nothing, or the choice name
-    # Captures the prompt name if present
-    start_regex = r'choice\s*(.+)*'
-    end_regex = '^endchoice.*$'
+    __slots__ = ()
+    end_regex = re.compile(r'^endchoice.*$')
 
 
 class KConfigMenu(KConfigParameter):
     """
     Abstraction of a linux kernel KConfig menu option
     """
-    # Menus start with "menu" followed by nothing, or the menu name
-    # Captures the prompt name if present
-    start_regex = r'^menu\s*(.+)*$'
-    end_regex = '^endmenu.*$'
+    __slots__ = ()
+    end_regex = re.compile(r'^endmenu.*$')
 
 
 @parse_with_type
@@ -144,9 +156,7 @@ class KConfigMenuconfig(KConfigParameter):
     """
     Abstraction of a linux kernel KConfig menuconfig option
     """
-    # Menuconfigs start with "menuconfig" followed by nothing, or the menuconfig name
-    # Captures the prompt name if present
-    start_regex = r'menuconfig\s*(.+)*'
+    __slots__ = ()
 
 
 @parse_with_type
@@ -154,20 +164,15 @@ class KConfigConfig(KConfigParameter):
     """
     Abstraction of a linux kernel KConfig config option
     """
-    # Configs start with "config" followed by the config name
-    # Captures the prompt name if present
-    start_regex = r'^config\s*(.+)*$'
-    variable_type = None
+    __slots__ = ()
 
 
 class KConfigIf(KConfigParameter):
     """
     Abstraction of a linux kernel KConfig if option
     """
-    # Ifs start with "if" followed by the if name
-    # Captures the prompt name if present
-    start_regex = r'if\s*(.+)*'
-    end_regex = r'^endif.*$'
+    __slots__ = ()
+    end_regex = re.compile(r'^endif.*$')
 
 
 class KConfigTypes(Enum):
@@ -178,6 +183,10 @@ class KConfigTypes(Enum):
     _if = KConfigIf
 
 
+# Maps the keyword starting a KConfig entry to its type, "if" is stored as "_if" in KConfigTypes
+KConfigKeywords = {t.name.lstrip('_'): t.value for t in KConfigTypes}
+
+
 @class_logger
 class KConfig:
     """
@@ -186,79 +195,284 @@ class KConfig:
     All KConfig objects are meant to be used as a collection of KConfigParameter objects
     They share a common base path and architecture, and can be used to parse KConfig files
     """
-    _source_re = r'^source\s+"(.+)"$'
+    _variable_re = re.compile(r'\$\((\w+)\)')
 
-    def __init__(self, file_path="Kconfig", base_path="/usr/src/linux", arch="x86", *args, **kwargs):
+    def __init__(self, file_path="Kconfig", base_path="/usr/src/linux", arch="x86", workers=None,
+                 read_threads=None, pending_configs=None, parse_cache=None, lazy=False, *args, **kwargs):
         """
         Creates a KConfig object
+
+        If workers is set, files sourced by this file are parsed in a pool of that many processes
+        If read_threads is set, queued sub config files are read ahead by a pool of that many threads
+        If pending_configs is set, the file is not parsed on creation, the owner of that queue parses it
+        parse_cache is shared by the sub configs of a top level KConfig, so each file is parsed once per parse
+        If lazy is set, sourced files are not queued, each is parsed when its sub config contents are first used
+        """
+        # Set the initial state in one update, skipping the per attribute logging of class_logger
+        self.__dict__.update(file_path=file_path,
+                             base_path=base_path,
+                             arch=arch,
+                             # Values used to substitute $(VARIABLE) references in config lines
+                             variables={'SRCARCH': arch},
+                             workers=workers,
+                             read_threads=read_threads,
+                             lazy=lazy,
+                             _current_parameter=None,
+                             _sub_configs=dict(),
+                             # Set for lazy sub configs until their file is parsed
+                             _lazy_unparsed=lazy and pending_configs is not None,
+                             # Pending sub config results from worker processes, keyed by source
+                             _source_futures=dict(),
+                             # Sub configs waiting to be parsed, shared by every sub config of the top level KConfig
+                             _pending_configs=deque() if pending_configs is None else pending_configs,
+                             # Sub configs keyed by (normalized file path, arch), cached when they are created
+                             _parse_cache=dict() if parse_cache is None else parse_cache)
+
+        if pending_configs is None:
+            self.parse_config()
+
+    @property
+    def current_parameter(self):
+        """
+        The last entry parsed from the file, lazy sub configs are parsed when this is first used
+        """
+        self._parse_lazy()
+        return self._current_parameter
+
+    @property
+    def sub_configs(self):
+        """
+        KConfig objects for the files sourced by this file, keyed by source
+        Lazy sub configs are parsed when this is first used
+        """
+        self._parse_lazy()
+        return self._sub_configs
+
+    def _parse_lazy(self):
+        """
+        Parses the file of a lazy sub config, if it hasn't been parsed yet
+        """
+        if self._lazy_unparsed:
+            self._parse_file()
+            # Only cleared once parsing succeeds, so a failed parse is tried again when next used
+            self._lazy_unparsed = False
+
+    def parse_config(self):
         """
-        self.file_path = file_path
-        self.base_path = base_path
-        self.arch = arch
+        Parses the KConfig file, then the sub configs queued while parsing it
 
-        self.sub_configs = dict()
+        Sourced files are queued and parsed in a loop, rather than recursively
+        """
+        self._parse_file()
 
-        self.parse_config()
+        pending_configs = self._pending_configs
+        if not self.read_threads:
+            while pending_configs:
+                pending_configs.popleft()._parse_file()
+            return
 
-    def parse_config(self):
+        with ThreadPoolExecutor(max_workers=self.read_threads) as executor:
+            # Files are read in the pool as soon as they are queued, and parsed here in queue order
+            read_futures = {config: executor.submit(config._read_config_text) for config in pending_configs}
+            while pending_configs:
+                config = pending_configs.popleft()
+                queued = len(pending_configs)
+                config._parse_file(read_futures.pop(config).result())
+                # Start reading the sub configs queued while parsing that file
+                for index in range(queued, len(pending_configs)):
+                    sub_config = pending_configs[index]
+                    read_futures[sub_config] = executor.submit(sub_config._read_config_text)
+
+    def _parse_file(self, config_text=None):
+        """
+        Parses the text of this KConfig file, reads it if it is not passed
+        """
+        if config_text is None:
+            config_text = self._read_config_text()
+
+        if self.workers:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                # Start parsing the sourced files, then parse this file while they are processed
+                for source in self._find_sources(config_text):
+                    # Files which were already parsed are taken from the cache by process_source
+                    if source not in self._source_futures and self._cache_key(source) not in self._parse_cache:
+                        self.logger.debug("Submitting source to worker: %s", source)
+                        self._source_futures[source] = executor.submit(_parse_source, self.base_path, source, self.arch)
+                self._parse_text(config_text)
+        else:
+            self._parse_text(config_text)
+
+    def _read_config_text(self):
         """
-        Parses a KConfig file
+        Reads the KConfig file in one go and returns its text
         """
         with open(f"{self.base_path}/{self.file_path}", 'r') as config_file:
-            self.logger.info("Parsing config file: %s" % config_file.name)
-            for line in config_file:
-                self.parse_line(line)
+            self.logger.info("Parsing config file: %s", config_file.name)
+            return config_file.read()
 
-    def _skip_line(self, config_line):
+    def _parse_text(self, config_text):
         """
-        Checks if a line should be skipped
+        Parses the text of a KConfig file
+
+        Lines starting with a handled keyword are found by _find_directives,
+        the lines between them are passed to the current parameter by _parse_body
         """
-        if config_line.startswith('#'):
-            self.logger.log(5, "Skipping comment: %s" % config_line)
-            return True
-        elif config_line == '':
-            self.logger.log(5, "Skipping empty line")
-            return True
-        else:
-            return False
+        # Bind the names used in the loop once, it runs for every entry in the file
+        parse_body = self._parse_body
+        line_handlers = self._line_handlers
+        body_start = 0
+        for match in self._find_directives(config_text):
+            parse_body(config_text[body_start:match.start()])
+            body_start = match.end()
+
+            keyword, arguments = match.groups()
+            if "$" in arguments:
+                arguments = self.substitute_vars(arguments)
+            arguments = arguments.rstrip()
+            line_handlers[keyword](self, keyword, [arguments] if arguments else [])
+        parse_body(config_text[body_start:])
+
+    def _parse_body(self, body_text):
+        """
+        Passes the lines between handled lines to the current parameter
+        """
+        # Most entries are directly followed by another handled line, or only have help text
+        if not body_text or body_text.isspace():
+            return
+
+        logger = self.logger
+        current_parameter = self._current_parameter
+        for line in body_text.splitlines():
+            # Most lines have no trailing whitespace, only strip the ones which do
+            if line and line[-1] <= ' ':
+                line = line.rstrip()
+            # Skip empty lines and comments
+            if not line or line[0] == '#':
+                continue
+            if "$" in line:
+                line = self.substitute_vars(line)
+
+            if current_parameter is not None and current_parameter.process_line(line):
+                logger.debug("Line processed using current parameter: %s", current_parameter)
+            else:
+                logger.debug("Unhandled config line: %s", line)
+
+    def _find_directives(self, config_text):
+        """
+        Yields the _directive_re matches for the handled lines in the text of a KConfig file
+
+        Help text is skipped, it is passed to the current parameter with the rest of the entry's lines
+        """
+        directive_search = self._directive_re.search
+        position = 0
+        while match := directive_search(config_text, position):
+            position = match.end()
+            if match.group(1) in self._help_keywords:
+                position = self._find_help_end(config_text, position)
+            else:
+                yield match
+
+    @staticmethod
+    def _find_help_end(config_text, position):
+        """
+        Returns the position of the first line after the help text starting at position
+
+        Like kconfig, help text ends at the first line which is indented less than its first line
+        Blank lines are part of the help text, help text must be indented
+        """
+        help_indent = None
+        text_end = len(config_text)
+        while position < text_end:
+            if (line_end := config_text.find('\n', position)) == -1:
+                line_end = text_end
+            if line := config_text[position:line_end].expandtabs():
+                if stripped := line.lstrip():
+                    indent = len(line) - len(stripped)
+                    if help_indent is None:
+                        help_indent = indent
+                    if not indent or indent < help_indent:
+                        return position
+            position = line_end + 1
+        return text_end
+
+    def _find_sources(self, config_text):
+        """
+        Yields the file paths sourced in the text of a KConfig file
+        """
+        for match in self._find_directives(config_text):
+            keyword, arguments = match.groups()
+            if keyword == 'source':
+                if not (source := self.substitute_vars(arguments).rstrip().strip('"')).endswith(".include"):
+                    yield source
 
     def parse_line(self, config_line):
         """
         Parses a line from a KConfig file
         """
-        # First remove the trailing spaces and newline
-        config_line = config_line.rstrip()
-        # Substitute the vars if possible
-        config_line = self.substitute_vars(config_line)
+        # A single line is parsed like a file, so it's classified by the same regex
+        # Help text can't be recognized one line at a time, it is only skipped when parsing whole files
+        self._parse_text(config_line)
 
-        # Skip the line if it shouldn't be processed
-        if self._skip_line(config_line):
-            self.logger.log(5, "Skipping line: %s" % config_line)
-            return
+    def _parse_source_line(self, keyword, arguments):
+        """
+        Handles source lines, in the form: source "path"
+        """
+        source = arguments[0].strip('"')
+        self.logger.debug("Source line found: %s", source)
+        self.process_source(source)
+        self.logger.info("Added source: %s", source)
 
-        # Check if the line is a source line and process it if so
-        if re.search(self._source_re, config_line):
-            source = re.search(self._source_re, config_line).group(1)
-            self.logger.debug("Source line found: %s" % source)
-            self.process_source(source)
-            self.logger.info("Added source: %s" % source)
-        # Attempt to process the line with the current config parameter if it's set
-        elif hasattr(self, 'current_parameter') and self.current_parameter.process_line(config_line):
-            self.logger.debug("Line processed using current parameter: %s" % self.current_parameter)
-            return
-        # Create a new config parameter using the line
-        elif line_config := KConfigParameter(config_line):
-            self.logger.info("Found config line: %s" % line_config)
-            self.current_parameter = line_config
+    def _parse_entry_line(self, keyword, arguments):
+        """
+        Handles lines which start a new entry, creates a new config parameter of the keyword's type
+        """
+        kconfig_type = KConfigKeywords[keyword]
+        line_config = kconfig_type(value=arguments[0]) if arguments else kconfig_type()
+        self.logger.info("Found config line: %s", line_config)
+        self._current_parameter = line_config
+
+    # Line handlers, keyed by the first token of the line
+    _line_handlers = {**dict.fromkeys(KConfigKeywords, _parse_entry_line),
+                      'source': _parse_source_line}
+    # Keywords starting help text, which ends when the indentation drops
+    _help_keywords = ('help', '---help---')
+    # Matches lines starting with a handled or help keyword, capturing the keyword and the rest of the line
+    # The keyword must be followed by whitespace or the end of the line, like the first token of a split
+    # Source lines must only contain a quoted path, other lines starting with "source" are not handled
+    _directive_re = re.compile(r'^[^\S\n]*(' + "|".join([*KConfigKeywords, *_help_keywords,
+                                                         r'source(?=[^\S\n]+"[^"\n]+"[^\S\n]*$)'])
+                               + r')(?!\S)[^\S\n]*(.*)$', re.MULTILINE)
 
     def process_source(self, source):
         """
         Processes a source line
         """
         if source.endswith(".include"):
-            self.logger.warning("Skipping include: %s" % source)
+            self.logger.warning("Skipping include: %s", source)
             return
-        self.sub_configs[source] = KConfig(base_path=self.base_path, arch=self.arch, file_path=source)
+
+        cache_key = self._cache_key(source)
+        if sub_config := self._parse_cache.get(cache_key):
+            self.logger.debug("Using cached config for source: %s", source)
+        elif source_future := self._source_futures.pop(source, None):
+            self.logger.debug("Using config parsed by worker for source: %s", source)
+            sub_config = source_future.result()
+            self._parse_cache[cache_key] = sub_config
+        else:
+            sub_config = KConfig(base_path=self.base_path, arch=self.arch, file_path=source,
+                                 pending_configs=self._pending_configs, parse_cache=self._parse_cache, lazy=self.lazy)
+            # Queue the sub config to be parsed after this file, lazy sub configs parse themselves when used
+            if not self.lazy:
+                self._pending_configs.append(sub_config)
+            self._parse_cache[cache_key] = sub_config
+        self._sub_configs[source] = sub_config
+
+    def _cache_key(self, source):
+        """
+        Returns the parse cache key for a sourced file
+        Keyed by the resolved path, so different spellings of the same file share an entry
+        """
+        return normpath(join(self.base_path, source)), self.arch
 
     def substitute_vars(self, config_line):
         """
@@ -267,22 +481,65 @@ class KConfig:
         if "$" not in config_line:
             return config_line
 
-        if "$(SRCARCH)" in config_line:
-            config_line = config_line.replace("$(SRCARCH)", self.arch)
+        return self._variable_re.sub(self._substitute_var, config_line)
 
-        return config_line
+    def _substitute_var(self, match):
+        """
+        Returns the value for a matched variable, unknown variables are left as they are
+        """
+        return self.variables.get(match.group(1), match.group(0))
 
     def __str__(self):
         """
         prints the contents of the KConfig object
         """
-        out_str = f"Printing config for: {self.base_path}/{self.file_path}\n"
-        if hasattr(self, 'current_parameter'):
-            out_str += str(self.current_parameter)
+        out_strs = []
+        # Walk the sub configs depth first with a stack, deep source trees would exceed the recursion limit
+        # Entries are (config, leaving), leaving entries are pushed below the sub configs to end the config's path
+        configs = [(self, False)]
+        # Ids of the configs being printed, files which source themselves through their sub configs are skipped
+        path = set()
+        while configs:
+            config, leaving = configs.pop()
+            if leaving:
+                path.remove(id(config))
+                continue
+            if id(config) in path:
+                out_strs.append(f"Skipping circular source: {config.base_path}/{config.file_path}\n")
+                continue
+
+            out_strs.append(f"Printing config for: {config.base_path}/{config.file_path}\n")
+            if config.current_parameter is not None:
+                out_strs.append(f"{config.current_parameter}\n")
+            path.add(id(config))
+            configs.append((config, True))
+            configs.extend((sub_config, False) for sub_config in reversed(config.sub_configs.values()))
+        return "".join(out_strs)
+
+
+def _load_yaml(file_path):
+    """
+    Loads a yaml file
+    The file is read as bytes, the yaml loader handles decoding itself
+    """
+    with open(file_path, 'rb') as yaml_file:
+        return load(yaml_file, Loader=YAMLLoader)
+
+
+@lru_cache(maxsize=128)
+def _load_yaml_template(file_path):
+    """
+    Loads a yaml template, cached by path so templates used multiple times are only parsed once
+    The returned dict is shared by every caller, it must not be modified
+    """
+    return _load_yaml(file_path)
+
 
-        for config in self.sub_configs.values():
-            out_str += str(config)
-        return out_str
+def _parse_source(base_path, file_path, arch):
+    """
+    Parses a sourced KConfig file, used by KConfig worker processes
+    """
+    return KConfig(base_path=base_path, file_path=file_path, arch=arch)
 
 
 @class_logger
@@ -315,37 +572,61 @@ class KernelDict(dict):
         if config_parameter := self._gen_config_obj_from_dict(key, value):
             self.update_value(config_parameter)
         else:
-            self.logger.warning("Failed to generate config parameter for: %s" % key)
+            self.logger.warning("Failed to generate config parameter for: %s", key)
 
     def load_config(self):
         """
         Loads the config values from the config file
         """
-        from yaml import safe_load
-        with open(self.config_file, 'r') as config_file:
-            for key, value in safe_load(config_file).items():
-                if key == 'templates':
-                    self.load_yaml_template(value)
-                else:
-                    self.config_values[key] = value
+        for key, value in _load_yaml(self.config_file).items():
+            if key == 'templates':
+                self.load_yaml_template(value)
+            else:
+                self.config_values[key] = value
 
     @handle_plural
     def load_yaml_template(self, template_file, template_dir='templates'):
         """
         Reads a yaml file containing kernel config values
         """
+        self._bulk_load(_load_yaml_template(self._get_template_path(template_file, template_dir)))
+
+    def _bulk_load(self, parameters):
+        """
+        Adds every parameter in a dict, skipping the per item checks of __setitem__ and update_value
+
+        Generated objects are always LinuxKernelConfigParameters, so they are stored directly
+        Parameters skipped by _gen_config_obj_from_dict have already been logged by it
+        """
+        # Bind the names used in the loop once, templates can contain hundreds of parameters
+        setitem = dict.__setitem__
+        gen_config_obj = self._gen_config_obj_from_dict
+        warning = self.logger.warning
+        # Expression results for this load, the same expressions are often used by many parameters
+        # They aren't kept after it, config_values can be changed by the caller between loads
+        expression_results = dict()
+        for key, value in parameters.items():
+            if (config_parameter := gen_config_obj(key, value, expression_results)) is None:
+                continue
+            if (name := config_parameter.name) in self:
+                warning("Key is already defined: %s", self[name])
+            setitem(self, name, config_parameter)
+
+    @staticmethod
+    def _get_template_path(template_file, template_dir='templates'):
+        """
+        Returns the path of a yaml template, adds the .yaml extension if it's missing
+        """
         template_file += '.yaml' if not template_file.endswith('.yaml') else ''
-        from yaml import safe_load
-        with open(f"{template_dir}/{template_file}", 'r') as yaml_file:
-            for key, value in safe_load(yaml_file).items():
-                self[key] = value
+        return f"{template_dir}/{template_file}"
 
-    def _gen_config_obj_from_dict(self, name, parameters):
+    def _gen_config_obj_from_dict(self, name, parameters, expression_results=None):
         """
         Assists in the creation of a LinuxKernelConfigParameter object
         if config_values is just a string, sets value to that.
 
         If it's a dict, does advanced handling, based on how the yaml should be defined.
+        If expression_results is passed, the results of if expressions are saved in and reused from it
 
         NOTE: The standard processing method treats the value as a string, and the key as the name
         """
@@ -356,15 +637,18 @@ class KernelDict(dict):
         if parameters is None:
             kwargs['defined'] = False
         elif isinstance(parameters, dict):
-            self.logger.info("Advanced parameters detected for config: %s" % name)
-            self.logger.debug("Parameters: %s" % parameters)
+            self.logger.info("Advanced parameters detected for config: %s", name)
+            self.logger.debug("Parameters: %s", parameters)
             kwargs['value'] = parameters['value']
-            if 'description' in parameters:
-                kwargs['description'] = parameters['description']
-            if 'if' in parameters:
-                # if there is an if expression, check it
-                if True not in [self.check_expression(expression) for expression in parameters['if']]:
-                    self.logger.warning("All tests failed for: %s" % parameters['if'])
+            if (description := parameters.get('description')) is not None:
+                kwargs['description'] = description
+            if (expressions := parameters.get('if')) is not None:
+                # if there is an if expression, check it, stopping at the first which passes
+                if expression_results is None:
+                    expression_results = dict()
+                if not any(self._check_expression_with_results(expression, expression_results)
+                           for expression in expressions):
+                    self.logger.warning("All tests failed for: %s", expressions)
                     return
         else:
             kwargs['value'] = str(parameters)
@@ -379,24 +663,35 @@ class KernelDict(dict):
             raise ValueError("Value is not a LinuxKernelConfigParamter: %s" % value)
 
         if value.name in self:
-            self.logger.warning("Key is already defined: %s" % self[value.name])
+            self.logger.warning("Key is already defined: %s", self[value.name])
 
         super().__setitem__(value.name, value)
 
+    def _check_expression_with_results(self, expression, expression_results):
+        """
+        Checks an expression, reusing its result if it's in expression_results
+        Results are keyed by the expression items, expressions with unhashable values are always checked
+        """
+        try:
+            results_key = tuple(expression.items())
+            return expression_results[results_key]
+        except KeyError:
+            result = expression_results[results_key] = self.check_expression(expression)
+            return result
+        except TypeError:
+            return self.check_expression(expression)
+
     def check_expression(self, expression):
         """
         Checks if an expression is true
-
         """
-        self.logger.debug("Checking expression: %s" % expression)
-        output = False
-        if 'is' in expression:
-            output = self._expression_is(expression)
-
+        self.logger.debug("Checking expression: %s", expression)
+        # Only evaluate one check, 'in' takes precedence when both keys are present
         if 'in' in expression:
-            output = self._expression_in(expression)
-
-        return output
+            return self._expression_in(expression)
+        if 'is' in expression:
+            return self._expression_is(expression)
+        return False
 
     def _expression_is(self, expression):
         """
@@ -404,7 +699,7 @@ class KernelDict(dict):
         """
         value = expression['value']
         config = self.config_values[expression['is']]
-        self.logger.debug("Checking that '%s' is equal to: %s" % (value, config))
+        self.logger.debug("Checking that '%s' is equal to: %s", value, config)
         return True if value == config else False
 
     def _expression_in(self, expression):
@@ -413,11 +708,15 @@ class KernelDict(dict):
         """
         value = expression['value']
         config = self.config_values[expression['in']]
-        self.logger.debug("Checking that '%s' is in list: %s" % (value, config))
+        self.logger.debug("Checking that '%s' is in list: %s", value, config)
         return True if value in config else False
 
     def __str__(self):
-        return "".join([f"{str(parameter)}\n" for parameter in self.values()])
+        return "".join(f"{parameter}\n" for parameter in self.values())
+
+
+# Marks LinuxKernelConfigParameter components which have no default value
+_NO_DEFAULT = object()
 
 
 @class_logger
@@ -425,77 +724,121 @@ class LinuxKernelConfigParameter:
     """
     Abstraction of a linux kernel .config parameter
     """
-    _invalid_name_chars = r'[^a-zA0-Z_0-9]'
-    _basic_value_match = r'^(-?([0-9])+|[ynm])'
-    _string_value_patch = r'^([a-zA-Z0-9/_.,-=\(\) ])*$'
-
-    components = OrderedDict({'name': {'required': True},
-                              'value': {'required': False},
-                              'defined': {'required': False, 'default': True},
-                              'description': {'required': False}})
+    # Components are properties, name and value validate and normalize what they're set to
+    # Setting any component clears the cached rendering
+    __slots__ = ('logger', '_name', '_value', '_defined', '_description', '_needs_quotes', '_rendered')
+
+    # Deletes every valid name character, anything left over is invalid
+    _name_strip_table = str.maketrans('', '', ascii_letters + digits + '_')
+    # Values which are written without quotes: tristates, decimal and hex numbers
+    _basic_value_match = re.compile(r'-?[0-9]+|0x[0-9a-fA-F]+|[ynm]')
+    # Characters allowed in any value, basic values are a subset of these
+    _valid_value_match = re.compile(r'[a-zA-Z0-9/_.,=() -]*')
+
+    # (name, required, default) for each component, _NO_DEFAULT marks components without a default
+    # Components are set in this order, setting value sets defined, so a passed defined overrides it
+    # Defaults are only used for components which are still unset, so the defined default doesn't override value
+    components = (('name', True, _NO_DEFAULT),
+                  ('value', False, _NO_DEFAULT),
+                  ('defined', False, True),
+                  ('description', False, _NO_DEFAULT))
 
     def __init__(self, *args, **kwargs):
         """
         Creates a LinuxKernelConfigParameter object
-        based on the components defined in the components OrderedDict
+        based on the components defined in the components tuple
         and the arguments passed in **kwargs
         """
-        for component_name, specification in self.components.items():
+        # Cached output of __str__, cleared when a component is set
+        self._rendered = None
+
+        for component_name, required, default in self.components:
             if component_name in kwargs:
                 setattr(self, component_name, kwargs[component_name])
-            elif 'default' in specification:
-                setattr(self, component_name, specification['default'])
-            elif specification['required']:
+            elif default is not _NO_DEFAULT and not hasattr(self, component_name):
+                setattr(self, component_name, default)
+            elif required:
                 raise ValueError(f"Missing required component {component_name}")
 
-    def __setattr__(self, name, value):
+    @property
+    def name(self):
         """
-        When setting an attribute, checks if there is a _validate_{attribute_name} method,
-        if so, checks if the value is valid before setting the attribute.
-
-        If the checks pass, checks if there is a _set_{attribute_name} method, if so, calls
-        that method to set the attribute.
-
-        otherwise uses the default setattr method
+        The config parameter name, always starting with CONFIG_
         """
-        if hasattr(self, f"_validate_{name}"):
-            validator = getattr(self, f"_validate_{name}")
-            if not validator(value):
-                raise ValueError(f"Invalid value for {name}: {value}")
+        return self._name
 
-        if hasattr(self, f"_set_{name}"):
-            getattr(self, f"_set_{name}")(value)
-        else:
-            super().__setattr__(name, value)
-
-    def _set_name(self, name):
+    @name.setter
+    def name(self, name):
         """
-        Sets the name, normalizes to a config paramter name, checks the name
+        Sets the name, checks the name, then normalizes it to a config paramter name
         """
+        if not self._validate_name(name):
+            raise ValueError(f"Invalid value for name: {name}")
+
         name = name.upper()
 
         if not name.startswith('CONFIG_'):
-            self.logger.info("Config name '%s' does not start with 'CONFIG_', appending" % name)
+            self.logger.info("Config name '%s' does not start with 'CONFIG_', appending", name)
             name = 'CONFIG_' + name
 
-        super().__setattr__('name', name)
+        # Names are used as KernelDict keys, intern them so lookups can compare by identity
+        self._name = intern(name)
+        self._rendered = None
 
-    def _set_value(self, value):
+    @property
+    def value(self):
         """
-        Sets the value of the config parameter
+        The config parameter value
         """
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        """
+        Sets the value of the config parameter after checking it, None sets defined to False
+        """
+        if not self._validate_value(value):
+            raise ValueError(f"Invalid value for value: {value}")
+
         if value is None:
-            self.logger.warning("Value for '%s' is None, setting defined to False" % self.name)
+            self.logger.warning("Value for '%s' is None, setting defined to False", self.name)
             self.defined = False
         else:
-            self.logger.debug("Value for '%s' is defined, setting defined to True" % self.name)
+            self.logger.debug("Value for '%s' is defined, setting defined to True", self.name)
             self.defined = True
 
-        super().__setattr__('value', value)
+        self._value = value
+        # Decide if the value needs quotes once, rather than each time it's rendered
+        self._needs_quotes = self._basic_value_match.fullmatch(str(value)) is None
+        self._rendered = None
+
+    @property
+    def defined(self):
+        """
+        False if the config parameter is written as not set
+        """
+        return self._defined
+
+    @defined.setter
+    def defined(self, defined):
+        self._defined = defined
+        self._rendered = None
+
+    @property
+    def description(self):
+        """
+        Written as a comment above the config parameter, raises AttributeError if it was never set
+        """
+        return self._description
+
+    @description.setter
+    def description(self, description):
+        self._description = description
+        self._rendered = None
 
     def _validate_name(self, name):
         """Validates the characters in a kernel config parameter name"""
-        return not re.search(self._invalid_name_chars, name)
+        return not name.translate(self._name_strip_table)
 
     def _validate_value(self, value):
         """
@@ -503,16 +846,35 @@ class LinuxKernelConfigParameter:
 
         NOTE: This is a very basic check, it does not check if the value is valid for the parameter
         """
-        if re.search(self._basic_value_match, str(value)):
+        # None is written as not set
+        if value is None:
             return True
-        elif re.search(self._string_value_patch, value):
+        value = str(value)
+        # Tristates and integers are the most common values, accept them without using the regex
+        if value in ('y', 'n', 'm') or (value.isascii() and value.lstrip('-').isdigit()):
             return True
+        return self._valid_value_match.fullmatch(value) is not None
+
+    def _render(self):
+        """
+        Builds the .config representation of the parameter
+        """
+        if not self.defined:
+            output_str = f"# {self.name} is not set"
+        elif self._needs_quotes:
+            output_str = f'{self.name}="{self.value}"'
         else:
-            return False
+            output_str = f"{self.name}={self.value}"
 
-    def __str__(self):
-        output_str = f"# {self.description}\n" if hasattr(self, 'description') else ""
-        out_val = self.value if re.search(self._basic_value_match, str(self.value)) else f'"{self.value}"'
-        output_str += f"{self.name}={out_val}" if self.defined else f"# {self.name} is not set"
+        if hasattr(self, 'description'):
+            return f"# {self.description}\n{output_str}"
         return output_str
 
+    def __str__(self):
+        """
+        Returns the .config representation of the parameter, rendered once and cached
+        """
+        if self._rendered is None:
+            self._rendered = self._render()
+        return self._rendered
+
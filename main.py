@@ -8,7 +8,8 @@ from logging import getLogger, StreamHandler
 
 if __name__ == '__main__':
     logger = getLogger()
-    logger.setLevel('DEBUG')
+    # DEBUG logs every parsed line, only enable it when debugging the parser
+    logger.setLevel('INFO')
     stdout_handler = StreamHandler()
     stdout_handler.setFormatter(ColorLognameFormatter(fmt='%(levelname)s | %(name)-70s | %(message)s'))
     logger.addHandler(stdout_handler)
@@ -152,8 +152,13 @@ def thread_wrapped(thread_name):
 def class_logger(cls):
     """
     Decorator for classes to add a logging object and log basic tasks
+    If the class defines __slots__, they must include 'logger'
     """
     class ClassWrapper(cls):
+        # Don't add a __dict__ to classes which use __slots__
+        if hasattr(cls, '__slots__'):
+            __slots__ = ()
+
         def __init__(self, *args, **kwargs):
             parent_logger = kwargs.pop('logger') if isinstance(kwargs.get('logger'), logging.Logger) else logging.getLogger()
             self.logger = parent_logger.getChild(cls.__name__)
@@ -191,13 +196,18 @@ def class_logger(cls):
 
         def __setattr__(self, name, value):
             super().__setattr__(name, value)
-            if not isinstance(self.logger, logging.Logger):
+            logger = self.logger
+            if not isinstance(logger, logging.Logger):
                 raise ValueError("The logger is not defined")
 
-            if isinstance(value, list) or isinstance(value, dict) or isinstance(value, str) and "\n" in value:
-                self.logger.log(5, "Set '%s' to:\n%s" % (name, value))
+            # This runs for every attribute set, only build the message if it will be logged
+            if not logger.isEnabledFor(5):
+                return
+
+            if isinstance(value, (list, dict)) or isinstance(value, str) and "\n" in value:
+                logger.log(5, "Set '%s' to:\n%s", name, value)
             else:
-                self.logger.log(5, "Set '%s' to: %s" % (name, value))
+                logger.log(5, "Set '%s' to: %s", name, value)
 
     ClassWrapper.__name__ = cls.__name__
     ClassWrapper.__module__ = cls.__module__